@@ -20,6 +20,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import json
 import logging
 import os
@@ -39,7 +40,9 @@ from img_proof.ipa_constants import (
     IPA_HISTORY_FILE,
     IPA_RESULTS_PATH,
     NOT_IMPLEMENTED,
-    TEST_PATHS
+    TEST_PATHS,
+    WAIT_INITIAL_DELAY,
+    WAIT_MAX_DELAY
 )
 from img_proof.ipa_rhel import RHEL
 from img_proof.ipa_fedora import Fedora
@@ -74,6 +77,8 @@ class IpaCloud(object):
     specific methods for launching and managing instances.
     """
     cloud = 'base'
+    # Instance states from which the instance cannot recover (lowercase)
+    terminal_states = ()
 
     def __init__(
         self,
@@ -475,6 +480,25 @@ class IpaCloud(object):
         """Terminate the instance."""
         raise NotImplementedError(NOT_IMPLEMENTED)
 
+    def _check_terminal_state(self, state, current_state):
+        """
+        Raise if instance is in a terminal state other than given state.
+
+        Prevents waiting until timeout on an instance which can
+        no longer arrive at the given state.
+        """
+        current_state = current_state.lower()
+
+        if current_state != state.lower() and \
+                current_state in self.terminal_states:
+            raise IpaCloudException(
+                'Instance entered terminal state {current_state} while '
+                'waiting for {state}.'.format(
+                    current_state=current_state,
+                    state=state
+                )
+            )
+
     def _collect_vm_info(self):
         """
         Gather basic info about VM
@@ -493,19 +517,92 @@ class IpaCloud(object):
             test_log=self.log_file
         )
 
-    def _wait_on_instance(self, state, timeout=600, wait_period=10):
-        """Wait until instance is in given state."""
-        current_state = 'Undefined'
-        start = time.time()
-        end = start + timeout
+    def _next_poll_delay(self, state, current_state, delay, max_delay):
+        """
+        Check a polled instance state and return the next delay.
+
+        Shared by _wait_on_instance and _await_state so both use the
+        same backoff and terminal state handling.
+
+        Returns:
+            None if the instance is in the given state, otherwise the
+            delay doubled and capped at max_delay.
+        Raises:
+            IpaCloudException: If the instance is in a terminal state.
+        """
+        if state.lower() == current_state.lower():
+            return None
+
+        self._check_terminal_state(state, current_state)
+        return min(delay * 2, max_delay)
+
+    def _wait_on_instance(
+        self,
+        state,
+        timeout=600,
+        initial_delay=WAIT_INITIAL_DELAY,
+        max_delay=WAIT_MAX_DELAY
+    ):
+        """
+        Wait until instance is in given state.
+
+        The instance state is polled with an exponential backoff
+        starting at initial_delay and capped at max_delay seconds.
+        """
+        delay = initial_delay
+        end = time.time() + timeout
 
         while time.time() < end:
-            time.sleep(wait_period)
+            time.sleep(delay)
 
-            current_state = self._get_instance_state()
-            if state.lower() == current_state.lower():
+            delay = self._next_poll_delay(
+                state,
+                self._get_instance_state(),
+                delay,
+                max_delay
+            )
+            if delay is None:
                 return
 
+        self._raise_wait_timeout(state)
+
+    async def _await_state(
+        self,
+        state,
+        timeout=600,
+        initial_delay=WAIT_INITIAL_DELAY,
+        max_delay=WAIT_MAX_DELAY
+    ):
+        """
+        Wait until instance is in given state without blocking.
+
+        Same backoff as _wait_on_instance but the event loop is free
+        while sleeping and the state is retrieved in an executor.
+        """
+        loop = asyncio.get_event_loop()
+        delay = initial_delay
+        end = loop.time() + timeout
+
+        while loop.time() < end:
+            await asyncio.sleep(delay)
+
+            current_state = await loop.run_in_executor(
+                None,
+                self._get_instance_state
+            )
+            delay = self._next_poll_delay(
+                state,
+                current_state,
+                delay,
+                max_delay
+            )
+            if delay is None:
+                return
+
+        self._raise_wait_timeout(state)
+
+    def _raise_wait_timeout(self, state):
+        """Raise exception for an instance that missed the given state."""
         raise IpaCloudException(
             'Instance has not arrived at the given state: {state}'.format(
                 state=state
@@ -562,6 +659,17 @@ class IpaCloud(object):
         else:
             self._write_to_log(out)
 
+    async def launch(self):
+        """
+        Launch an instance of the given image without blocking.
+
+        Instances of several clouds can be launched concurrently
+        with asyncio.gather. Clouds without an async wait run the
+        blocking launch in an executor.
+        """
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._launch_instance)
+
     def process_injection_file(self, client):
         """
         Load yaml file and process injection configuration.
@@ -39,6 +39,32 @@ OCI_DEFAULT_USER = 'opc'
 ALIYUN_DEFAULT_TYPE = 'ecs.t5-lc1m1.small'
 ALIYUN_DEFAULT_USER = 'ali-user'
 
+# Exponential backoff bounds (seconds) when polling for instance state
+WAIT_INITIAL_DELAY = 1
+WAIT_MAX_DELAY = 15
+
+# Seconds a successful EC2 connection test is trusted across instances
+EC2_CONNECTION_CACHE_TTL = 600
+
+# Seconds a looked up EC2 instance is reused before it is fetched again
+EC2_INSTANCE_CACHE_TTL = 2
+
+# Seconds between keepalive packets on cached SSH connections
+SSH_KEEPALIVE_INTERVAL = 30
+
+# Maximum number of SSH clients kept open for reuse
+SSH_CLIENT_CACHE_SIZE = 64
+
+# Maximum seconds to block waiting for SSH channel output
+SSH_POLL_TIMEOUT = 1
+
+# Bytes read from an SSH channel per recv call
+SSH_RECV_BUFFER_SIZE = 65536
+
+# Exponential backoff bounds (seconds) between SSH connection attempts
+SSH_INITIAL_RETRY_DELAY = 1
+SSH_MAX_RETRY_DELAY = 30
+
 EC2_CONFIG_FILE = os.path.join(HOME, '.ec2utils.conf')
 IPA_CONFIG_FILE = os.path.join(HOME, '.config', 'img_proof', 'config')
 
@@ -20,6 +20,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import boto3
 import os
 import time
@@ -29,16 +30,22 @@ from collections import ChainMap, defaultdict
 from img_proof import ipa_utils
 from img_proof.ipa_constants import (
     EC2_CONFIG_FILE,
+    EC2_CONNECTION_CACHE_TTL,
     EC2_DEFAULT_TYPE,
-    EC2_DEFAULT_USER
+    EC2_DEFAULT_USER,
+    EC2_INSTANCE_CACHE_TTL
 )
 from img_proof.ipa_exceptions import EC2CloudException
 from img_proof.ipa_cloud import IpaCloud
 
+# Expiry time of tested connections keyed by (region, access key id)
+CONNECTION_CACHE = {}
+
 
 class EC2Cloud(IpaCloud):
     """Cloud framework class for testing AWS EC2 images."""
     cloud = 'ec2'
+    terminal_states = ('shutting-down', 'terminated')
 
     def post_init(self):
         """Initialize EC2 cloud framework class."""
@@ -47,6 +54,8 @@ class EC2Cloud(IpaCloud):
         cmd_line_values = self._get_non_null_values(self.custom_args)
 
         self.zone = None
+        self._resource = None
+        self._instance_cache = (None, None, 0.0)
         self.account_name = self.custom_args.get('account_name')
 
         if not self.account_name:
@@ -115,7 +124,17 @@ class EC2Cloud(IpaCloud):
             )
 
     def _connect(self):
-        """Connect to ec2 resource."""
+        """
+        Connect to ec2 resource.
+
+        The connection is tested once and reused for all
+        subsequent API calls of the instance. A successful test is
+        shared with other instances using the same region and
+        credentials for EC2_CONNECTION_CACHE_TTL seconds.
+        """
+        if self._resource:
+            return self._resource
+
         resource = None
         try:
             resource = boto3.resource(
@@ -124,16 +143,32 @@ class EC2Cloud(IpaCloud):
                 aws_secret_access_key=self.secret_access_key,
                 region_name=self.region
             )
-            # boto3 resource is lazy so attempt method to test connection
-            resource.meta.client.describe_account_attributes()
+            key = (self.region, self.access_key_id)
+            if CONNECTION_CACHE.get(key, 0) < time.time():
+                # boto3 resource is lazy so attempt method to test connection
+                resource.meta.client.describe_account_attributes()
+                CONNECTION_CACHE[key] = time.time() + EC2_CONNECTION_CACHE_TTL
         except Exception:
             raise EC2CloudException(
                 'Could not connect to region: %s' % self.region
             )
+
+        self._resource = resource
         return resource
 
     def _get_instance(self):
-        """Retrieve instance matching instance_id."""
+        """
+        Retrieve instance matching instance_id.
+
+        The instance is cached for EC2_INSTANCE_CACHE_TTL seconds so
+        consecutive helpers share one loaded describe_instances
+        response instead of each loading the instance again.
+        """
+        instance_id, instance, timestamp = self._instance_cache
+        if instance and instance_id == self.running_instance_id and \
+                time.time() - timestamp < EC2_INSTANCE_CACHE_TTL:
+            return instance
+
         resource = self._connect()
 
         try:
@@ -144,6 +179,12 @@ class EC2Cloud(IpaCloud):
                     instance_id=self.running_instance_id
                 )
             )
+
+        self._instance_cache = (
+            self.running_instance_id,
+            instance,
+            time.time()
+        )
         return instance
 
     def _get_instance_state(self):
@@ -156,6 +197,8 @@ class EC2Cloud(IpaCloud):
         state = None
 
         try:
+            # Refresh the (possibly cached) instance data in place
+            instance.reload()
             state = instance.state['Name']
         except Exception:
             raise EC2CloudException(
@@ -167,14 +210,18 @@ class EC2Cloud(IpaCloud):
 
         return state
 
+    def _invalidate_instance_cache(self):
+        """Drop the cached instance so the next lookup is fresh."""
+        self._instance_cache = (None, None, 0.0)
+
     def _is_instance_running(self):
         """
         Return True if instance is in running state.
         """
         return self._get_instance_state() == 'running'
 
-    def _launch_instance(self):
-        """Launch an instance of the given image."""
+    def _create_instance(self):
+        """Create an instance of the given image without waiting."""
         resource = self._connect()
 
         instance_name = self._generate_instance_name()
@@ -221,9 +268,20 @@ class EC2Cloud(IpaCloud):
             )
 
         self.running_instance_id = instances[0].instance_id
+        self._invalidate_instance_cache()
         self.logger.debug('ID of instance: %s' % self.running_instance_id)
+
+    def _launch_instance(self):
+        """Launch an instance of the given image."""
+        self._create_instance()
         self._wait_on_instance('running', self.timeout)
 
+    async def launch(self):
+        """Launch an instance of the given image without blocking."""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._create_instance)
+        await self._await_state('running', self.timeout)
+
     def _set_image_id(self):
         """If existing image used get image id."""
         instance = self._get_instance()
@@ -262,17 +320,20 @@ class EC2Cloud(IpaCloud):
         instance.start(**kwargs)
 
         self._wait_on_instance('running', self.timeout)
+        self._invalidate_instance_cache()
 
     def _stop_instance(self):
         """Stop the instance."""
         instance = self._get_instance()
         instance.stop()
         self._wait_on_instance('stopped', self.timeout)
+        self._invalidate_instance_cache()
 
     def _terminate_instance(self):
         """Terminate the instance."""
         instance = self._get_instance()
         instance.terminate()
+        self._invalidate_instance_cache()
 
     def get_console_log(self):
         """
@@ -20,12 +20,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import atexit
 import configparser
-import fnmatch
+import copy
 import json
 import logging
 import os
 import random
+import select
 import sys
 import time
 
@@ -33,24 +35,102 @@ import paramiko
 import yaml
 
 from binascii import hexlify
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from string import ascii_lowercase
 from tempfile import NamedTemporaryFile
 from paramiko.ssh_exception import AuthenticationException
 
-from img_proof.ipa_constants import SYNC_POINTS
+from img_proof.ipa_constants import (
+    SSH_CLIENT_CACHE_SIZE,
+    SSH_INITIAL_RETRY_DELAY,
+    SSH_KEEPALIVE_INTERVAL,
+    SSH_MAX_RETRY_DELAY,
+    SSH_POLL_TIMEOUT,
+    SSH_RECV_BUFFER_SIZE,
+    SYNC_POINTS
+)
 from img_proof.ipa_exceptions import IpaSSHException, IpaUtilsException
 
-CLIENT_CACHE = {}
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+CLIENT_CACHE = OrderedDict()
+CONFIG_CACHE = {}
+SSH_CONFIG_CACHE = {}
+YAML_CACHE = {}
+
+
+def add_test_files(tests, descriptions, test_files, description_files):
+    """
+    Add (name, path) pairs of test files and descriptions to the dicts.
+
+    Raises:
+        IpaUtilsException: If a name is already taken.
+    """
+    for name, path in test_files:
+        if name not in tests:
+            tests[name] = path
+        else:
+            raise IpaUtilsException(
+                'Duplicate test file name found: %s, %s'
+                % (path, tests.get(name))
+            )
+
+    for name, path in description_files:
+        if name in tests:
+            raise IpaUtilsException(
+                'Test description name matches test file: %s, %s'
+                % (path, tests.get(name))
+            )
+        elif name not in descriptions:
+            descriptions[name] = path
+        else:
+            raise IpaUtilsException(
+                'Duplicate test description file name found: %s, %s'
+                % (path, descriptions.get(name))
+            )
+
+
+def backoff(delay, max_delay=SSH_MAX_RETRY_DELAY):
+    """
+    Sleep for delay plus up to 50% random jitter.
+
+    The jitter prevents retries from many clients synchronizing.
+
+    Returns:
+        The next delay, doubled and capped at max_delay.
+    """
+    time.sleep(delay + random.uniform(0, delay * 0.5))
+    return min(delay * 2, max_delay)
+
+
+def cache_client(ip, ssh_user, client):
+    """
+    Add the client to the client cache.
+
+    The least recently used clients are closed and evicted once
+    the cache holds more than SSH_CLIENT_CACHE_SIZE clients.
+    """
+    CLIENT_CACHE[(ip, ssh_user)] = client
+    CLIENT_CACHE.move_to_end((ip, ssh_user))
+
+    while len(CLIENT_CACHE) > SSH_CLIENT_CACHE_SIZE:
+        key, old_client = CLIENT_CACHE.popitem(last=False)
+        with ignored(Exception):
+            old_client.close()
 
 
 def clear_cache(ip=None):
-    """Clear the client cache or remove key matching the given ip."""
+    """Clear the client cache or remove keys matching the given ip."""
     if ip:
-        with ignored(Exception):
-            client = CLIENT_CACHE[ip]
-            del CLIENT_CACHE[ip]
-            client.close()
+        for key in [key for key in CLIENT_CACHE if key[0] == ip]:
+            client = CLIENT_CACHE.pop(key)
+            with ignored(Exception):
+                client.close()
     else:
         for client in CLIENT_CACHE.values():
             with ignored(Exception):
@@ -58,6 +138,17 @@ def clear_cache(ip=None):
         CLIENT_CACHE.clear()
 
 
+def clear_ssh_config_cache():
+    """Remove all cached ssh config files."""
+    for path in SSH_CONFIG_CACHE.values():
+        with ignored(OSError):
+            os.remove(path)
+    SSH_CONFIG_CACHE.clear()
+
+
+atexit.register(clear_ssh_config_cache)
+
+
 def establish_ssh_connection(ip,
                              ssh_private_key_file,
                              ssh_user,
@@ -67,12 +158,16 @@ def establish_ssh_connection(ip,
     """
     Establish ssh connection and return paramiko client.
 
+    Only the provided private key is used. Other keys found
+    in ~/.ssh are not tried.
+
     Raises:
         IpaSSHException: If connection cannot be established
             in given number of attempts.
     """
     client = paramiko.SSHClient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    delay = SSH_INITIAL_RETRY_DELAY
 
     while attempts:
         try:
@@ -81,13 +176,15 @@ def establish_ssh_connection(ip,
                 port=port,
                 username=ssh_user,
                 key_filename=ssh_private_key_file,
+                look_for_keys=False,
                 timeout=timeout
             )
         except (FileNotFoundError, AuthenticationException):
             raise
         except:  # noqa: E722
             attempts -= 1
-            time.sleep(10)
+            if attempts:
+                delay = backoff(delay)
         else:
             return client
 
@@ -100,19 +197,41 @@ def execute_ssh_command(client, cmd):
     """
     Execute given command using paramiko.
 
+    The command runs in a new session channel on the existing
+    transport, so no new connection is made. Stdout and stderr
+    are read as data arrives to avoid blocking on either stream.
+    Output on stderr alone does not fail the command.
+
     Returns:
         String output of cmd execution.
     Raises:
-        IpaSSHException: If stderr returns a non-empty string.
+        IpaSSHException: If the command exits with a non-zero status.
     """
+    out = bytearray()
+    err = bytearray()
+
+    channel = client.get_transport().open_session()
     try:
-        stdin, stdout, stderr = client.exec_command(cmd)
-        err = stderr.read()
-        out = stdout.read()
-        if err:
-            raise IpaSSHException(out.decode() + err.decode())
-    except:  # noqa: E722
-        raise
+        channel.exec_command(cmd)
+
+        while True:
+            if channel.recv_ready():
+                out += channel.recv(SSH_RECV_BUFFER_SIZE)
+            elif channel.recv_stderr_ready():
+                err += channel.recv_stderr(SSH_RECV_BUFFER_SIZE)
+            elif channel.exit_status_ready():
+                break
+            else:
+                # Block until output arrives or the channel is closed
+                select.select([channel], [], [], SSH_POLL_TIMEOUT)
+
+        exit_status = channel.recv_exit_status()
+    finally:
+        channel.close()
+
+    if exit_status != 0:
+        raise IpaSSHException(out.decode() + err.decode())
+
     return out.decode()
 
 
@@ -214,6 +333,7 @@ def get_config_values(config_path, section, default='default'):
     Parse ini config file and return a dict of values.
 
     The provided section overrides any values in default section.
+    Parsed files are cached by path and modification time.
     """
     values = {}
 
@@ -222,24 +342,29 @@ def get_config_values(config_path, section, default='default'):
             'Config file not found: %s' % config_path
         )
 
-    config = configparser.ConfigParser()
+    key = os.path.abspath(config_path)
+    mtime = os.stat(config_path).st_mtime
+    cached = CONFIG_CACHE.get(key)
 
-    try:
-        config.read(config_path)
-    except Exception:
-        raise IpaUtilsException(
-            'Config file format invalid.'
-        )
+    if cached and cached[0] == mtime:
+        config = cached[1]
+    else:
+        config = configparser.ConfigParser()
 
-    try:
-        values.update(config.items(default))
-    except Exception:
-        pass
+        try:
+            config.read(config_path)
+        except Exception:
+            raise IpaUtilsException(
+                'Config file format invalid.'
+            )
 
-    try:
-        values.update(config.items(section))
-    except Exception:
-        pass
+        CONFIG_CACHE[key] = (mtime, config)
+
+    for name in (default, section):
+        # Check for the section first instead of handling NoSectionError
+        if name == config.default_section or config.has_section(name):
+            with ignored(configparser.Error):
+                values.update(config.items(name))
 
     return values
 
@@ -253,7 +378,12 @@ def get_host_key_fingerprint(client):
 
 def get_random_string(length=12):
     """Create random string of length with ascii lowercase chars."""
-    return ''.join(random.choice(ascii_lowercase) for index in range(length))
+    try:
+        chars = random.choices(ascii_lowercase, k=length)
+    except AttributeError:
+        # random.choices is not available before Python 3.6
+        chars = (random.choice(ascii_lowercase) for index in range(length))
+    return ''.join(chars)
 
 
 def get_ssh_client(ip,
@@ -262,17 +392,31 @@ def get_ssh_client(ip,
                    port=22,
                    timeout=600,
                    wait_period=10):
-    """Attempt to establish and test ssh connection."""
-    if CLIENT_CACHE.get(ip):
+    """
+    Attempt to establish and test ssh connection.
+
+    Failed attempts are retried with a jittered exponential backoff
+    until timeout. The wait_period is used as the socket timeout.
+    """
+    client = CLIENT_CACHE.get((ip, ssh_user))
+    if client:
         try:
-            execute_ssh_command(CLIENT_CACHE[ip], 'ls')
+            transport = client.get_transport()
+            if not transport or not transport.is_active():
+                raise IpaSSHException('SSH transport is not active.')
+
+            execute_ssh_command(client, 'ls')
         except Exception:
-            clear_cache(ip)
+            del CLIENT_CACHE[(ip, ssh_user)]
+            with ignored(Exception):
+                client.close()
         else:
-            return CLIENT_CACHE[ip]
+            CLIENT_CACHE.move_to_end((ip, ssh_user))
+            return client
 
     start = time.time()
     end = start + timeout
+    delay = SSH_INITIAL_RETRY_DELAY
 
     client = None
     while time.time() < end:
@@ -298,9 +442,11 @@ def get_ssh_client(ip,
         except:  # noqa: E722
             if client:
                 client.close()
-            wait_period += wait_period
+            delay = backoff(delay)
         else:
-            CLIENT_CACHE[ip] = client
+            # Keep the idle connection alive so it can be reused
+            client.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL)
+            cache_client(ip, ssh_user, client)
             return client
 
     raise IpaSSHException(
@@ -312,6 +458,9 @@ def get_test_files(test_dirs):
     """
     Walk all test dirs and find all tests and test descriptions.
 
+    The test dirs are walked concurrently and the results are
+    merged in the order the dirs are provided.
+
     Returns:
         A tuple containing a dict mapping test names to full path
         and a dict mapping test descriptions to full path.
@@ -322,40 +471,25 @@ def get_test_files(test_dirs):
     """
     tests = {}
     descriptions = {}
-    for test_dir in test_dirs:
-        if not os.path.exists(test_dir):
-            continue
 
-        for root, dirs, files in os.walk(test_dir):
-            test_files = fnmatch.filter(files, 'test_*.py')
-            description_files = fnmatch.filter(files, 'test_*.yaml')
-
-            for test_file in test_files:
-                path = os.path.join(root, test_file)
-                name, ext = test_file.split('.')
-                if name not in tests:
-                    tests[name] = path
-                else:
-                    raise IpaUtilsException(
-                        'Duplicate test file name found: %s, %s'
-                        % (path, tests.get(name))
-                    )
-
-            for description_file in description_files:
-                path = os.path.join(root, description_file)
-                name, ext = description_file.split('.')
-                if name in tests:
-                    raise IpaUtilsException(
-                        'Test description name matches test file: %s, %s'
-                        % (path, tests.get(name))
-                    )
-                elif name not in descriptions:
-                    descriptions[name] = path
-                else:
-                    raise IpaUtilsException(
-                        'Duplicate test description file name found: %s, %s'
-                        % (path, descriptions.get(name))
-                    )
+    if not test_dirs:
+        return tests, descriptions
+
+    if len(test_dirs) == 1:
+        results = [walk_test_dir(test_dir) for test_dir in test_dirs]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(8, len(test_dirs))
+        ) as executor:
+            results = list(executor.map(walk_test_dir, test_dirs))
+
+    for dir_tests, dir_descriptions in results:
+        add_test_files(
+            tests,
+            descriptions,
+            dir_tests.items(),
+            dir_descriptions.items()
+        )
 
     return tests, descriptions
 
@@ -371,15 +505,15 @@ def get_tests_from_description(name,
         descriptions (dict): Dict of test description name
                              (key) and absolute file paths
                              (value).
-        parsed (list): List of description paths which have
-                       already been parsed to prevent infinte
-                       recursion.
+        parsed (set): Set of description paths which have
+                      already been parsed to prevent infinte
+                      recursion.
     Returns:
         A list of expanded test files.
     """
     tests = []
-    if not parsed:
-        parsed = []
+    if parsed is None:
+        parsed = set()
 
     description = descriptions.get(name, None)
     if not description:
@@ -391,19 +525,22 @@ def get_tests_from_description(name,
     if description in parsed:
         return tests
 
-    parsed.append(description)
+    parsed.add(description)
     test_data = get_yaml_config(description)
 
-    if 'tests' in test_data:
-        tests += test_data.get('tests')
+    description_tests = test_data.get('tests')
+    if isinstance(description_tests, list):
+        tests.extend(description_tests)
+    elif description_tests:
+        tests.append(description_tests)
 
     if 'include' in test_data:
         for description_name in test_data.get('include'):
-            tests += get_tests_from_description(
+            tests.extend(get_tests_from_description(
                 description_name,
                 descriptions,
                 parsed
-            )
+            ))
 
     return tests
 
@@ -412,8 +549,9 @@ def get_yaml_config(config_path):
     """
     Load yaml config file and return dictionary.
 
-    Todo:
-        * This will need refactoring similar to the test search.
+    Parsed files are cached by path and modification time so
+    descriptions included multiple times are only parsed once.
+    A copy is returned to keep the cached config unchanged.
     """
     config_path = os.path.expanduser(config_path)
     if not os.path.isfile(config_path):
@@ -421,9 +559,19 @@ def get_yaml_config(config_path):
             'Config file not found: %s' % config_path
         )
 
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+    key = os.path.abspath(config_path)
+    mtime = os.stat(config_path).st_mtime
+    cached = YAML_CACHE.get(key)
+
+    if cached and cached[0] == mtime:
+        config = cached[1]
+    else:
+        # Binary mode lets the loader decode the file itself
+        with open(config_path, 'rb') as f:
+            config = yaml.load(f, Loader=YamlLoader)
+        YAML_CACHE[key] = (mtime, config)
+
+    return copy.deepcopy(config)
 
 
 @contextmanager
@@ -503,17 +651,30 @@ def redirect_output(fileobj):
 
 @contextmanager
 def ssh_config(ssh_user, ssh_private_key_file):
-    """Create temporary ssh config file."""
-    try:
-        ssh_file = NamedTemporaryFile(delete=False, mode='w+')
-        ssh_file.write('Host *\n')
-        ssh_file.write('    IdentityFile %s\n' % ssh_private_key_file)
-        ssh_file.write('    User %s' % ssh_user)
-        ssh_file.close()
-        yield ssh_file.name
-    finally:
-        with ignored(OSError):
-            os.remove(ssh_file.name)
+    """
+    Create temporary ssh config file.
+
+    The file is cached per user and private key and reused by later
+    calls with the same credentials. Cached files are removed at exit.
+    """
+    key = (ssh_user, ssh_private_key_file)
+    path = SSH_CONFIG_CACHE.get(key)
+
+    if not path or not os.path.isfile(path):
+        with NamedTemporaryFile(delete=False, mode='w') as ssh_file:
+            ssh_file.write(
+                'Host *\n'
+                '    IdentityFile {key_file}\n'
+                '    User {user}\n'.format(
+                    key_file=ssh_private_key_file,
+                    user=ssh_user
+                )
+            )
+
+        path = ssh_file.name
+        SSH_CONFIG_CACHE[key] = path
+
+    yield path
 
 
 def update_history_log(history_log,
@@ -555,6 +716,53 @@ def update_history_log(history_log,
             f.write(out.strip() + '\n')
 
 
+def walk_test_dir(test_dir):
+    """
+    Walk the test dir and find all tests and test descriptions.
+
+    Returns:
+        A tuple of dicts mapping test names and test description
+        names to full path.
+    """
+    tests = {}
+    descriptions = {}
+
+    if not os.path.exists(test_dir):
+        return tests, descriptions
+
+    stack = [test_dir]
+    while stack:
+        test_files = []
+        description_files = []
+
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            # Skip unreadable dirs the same way os.walk does
+            continue
+
+        # The scandir iterator is not a context manager before Python 3.6
+        try:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.startswith('test_') and entry.is_file():
+                    if entry.name.endswith('.py'):
+                        test_files.append((entry.name[:-3], entry.path))
+                    elif entry.name.endswith('.yaml'):
+                        description_files.append(
+                            (entry.name[:-5], entry.path)
+                        )
+        finally:
+            close = getattr(entries, 'close', None)
+            if close:
+                close()
+
+        add_test_files(tests, descriptions, test_files, description_files)
+
+    return tests, descriptions
+
+
 def get_logger(log_level):
     """
     Return new console logger at provided log level.
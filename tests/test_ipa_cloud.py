@@ -21,6 +21,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import io
 import pytest
 import os
@@ -656,6 +657,77 @@ class TestIpaCloud(object):
         cloud._wait_on_instance('Stopped')
         assert mock_get_instance_state.call_count == 1
 
+    @patch.object(IpaCloud, '_get_instance_state')
+    @patch('time.sleep')
+    def test_cloud_wait_on_instance_backoff(self,
+                                            mock_sleep,
+                                            mock_get_instance_state):
+        """Test wait on instance polls with exponential backoff."""
+        mock_get_instance_state.side_effect = [
+            'Pending', 'Pending', 'Pending', 'Pending', 'Pending', 'Running'
+        ]
+        mock_sleep.return_value = None
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud._wait_on_instance('Running')
+        assert mock_get_instance_state.call_count == 6
+        mock_sleep.assert_has_calls(
+            [call(1), call(2), call(4), call(8), call(15), call(15)]
+        )
+
+    @patch.object(IpaCloud, '_get_instance_state')
+    @patch('time.sleep')
+    def test_cloud_wait_on_instance_timeout(self,
+                                            mock_sleep,
+                                            mock_get_instance_state):
+        """Test wait on instance raises if state is never reached."""
+        mock_get_instance_state.return_value = 'Pending'
+        mock_sleep.return_value = None
+
+        cloud = IpaCloud(**self.kwargs)
+
+        with patch('time.time') as mock_time:
+            mock_time.side_effect = [0, 0, 0, 11]
+
+            with pytest.raises(IpaCloudException) as error:
+                cloud._wait_on_instance('Running', timeout=10)
+
+        assert str(error.value) == \
+            'Instance has not arrived at the given state: Running'
+        assert mock_get_instance_state.call_count == 2
+
+    @patch.object(IpaCloud, '_get_instance_state')
+    @patch('asyncio.sleep')
+    def test_cloud_await_state(self, mock_sleep, mock_get_instance_state):
+        """Test await state polls with exponential backoff."""
+        async def no_sleep(delay):
+            return None
+
+        mock_sleep.side_effect = no_sleep
+        mock_get_instance_state.side_effect = ['Pending', 'Pending', 'Running']
+
+        cloud = IpaCloud(**self.kwargs)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(cloud._await_state('Running'))
+        finally:
+            loop.close()
+
+        assert mock_get_instance_state.call_count == 3
+        mock_sleep.assert_has_calls([call(1), call(2), call(4)])
+
+    @patch.object(IpaCloud, '_launch_instance')
+    def test_cloud_launch(self, mock_launch_instance):
+        """Test async launch runs the blocking launch."""
+        cloud = IpaCloud(**self.kwargs)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(cloud.launch())
+        finally:
+            loop.close()
+
+        mock_launch_instance.assert_called_once_with()
+
     @patch.object(IpaCloud, '_get_ssh_client')
     def test_collect_vm_info(self, mock_get_ssh_client):
         """Test collect_vm_info method. """
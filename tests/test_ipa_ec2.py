@@ -21,11 +21,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import boto3
 import pytest
 
+from img_proof import ipa_ec2
 from img_proof.ipa_ec2 import EC2Cloud
-from img_proof.ipa_exceptions import EC2CloudException
+from img_proof.ipa_exceptions import EC2CloudException, IpaCloudException
 
 from unittest.mock import MagicMock, patch
 
@@ -35,6 +37,7 @@ class TestEC2Provider(object):
 
     def setup_method(self, method):
         """Set up kwargs dict."""
+        ipa_ec2.CONNECTION_CACHE.clear()
         self.kwargs = {
             'config': 'tests/data/config',
             'distro_name': 'SLES',
@@ -85,6 +88,28 @@ class TestEC2Provider(object):
         assert str(error.value) == msg
         assert mock_boto3.call_count > 0
 
+    @patch.object(boto3, 'resource')
+    def test_ec2_connect_reuses_resource(self, mock_boto3):
+        """Test the ec2 resource is only created and tested once."""
+        resource = MagicMock()
+        mock_boto3.return_value = resource
+
+        provider = EC2Cloud(**self.kwargs)
+        assert provider._connect() == resource
+        assert provider._connect() == resource
+
+        assert mock_boto3.call_count == 1
+        assert resource.meta.client.describe_account_attributes.call_count \
+            == 1
+
+        # Connection test is shared with other instances
+        provider = EC2Cloud(**self.kwargs)
+        assert provider._connect() == resource
+
+        assert mock_boto3.call_count == 2
+        assert resource.meta.client.describe_account_attributes.call_count \
+            == 1
+
     @patch.object(EC2Cloud, '_connect')
     def test_ec2_get_instance(self, mock_connect):
         """Test get instance method."""
@@ -98,6 +123,29 @@ class TestEC2Provider(object):
         assert val == instance
         assert mock_connect.call_count == 1
 
+    @patch.object(EC2Cloud, '_connect')
+    def test_ec2_get_instance_cache(self, mock_connect):
+        """Test get instance method reuses cached instance."""
+        instance = MagicMock()
+        resource = MagicMock()
+        resource.Instance.return_value = instance
+        mock_connect.return_value = resource
+
+        provider = EC2Cloud(**self.kwargs)
+        assert provider._get_instance() == instance
+        assert provider._get_instance() == instance
+        assert mock_connect.call_count == 1
+
+        provider._invalidate_instance_cache()
+        assert provider._get_instance() == instance
+        assert mock_connect.call_count == 2
+
+        # A different instance id is never served from the cache
+        provider.running_instance_id = 'i-987654321'
+        assert provider._get_instance() == instance
+        assert mock_connect.call_count == 3
+        resource.Instance.assert_called_with('i-987654321')
+
     @patch.object(EC2Cloud, '_connect')
     def test_ec2_get_instance_error(self, mock_connect):
         """Test get instance method error."""
@@ -125,6 +173,7 @@ class TestEC2Provider(object):
         val = provider._get_instance_state()
         assert val == 'ReadyRole'
         assert mock_get_instance.call_count == 1
+        assert instance.reload.call_count == 1
 
         instance.state = {}
         mock_get_instance.reset_mock()
@@ -154,6 +203,29 @@ class TestEC2Provider(object):
         assert not provider._is_instance_running()
         assert mock_get_instance_state.call_count == 1
 
+    @patch('time.sleep')
+    @patch.object(EC2Cloud, '_get_instance_state')
+    def test_ec2_wait_on_instance_terminated(
+        self, mock_get_instance_state, mock_sleep
+    ):
+        """Test waiting stops when instance enters a terminal state."""
+        mock_get_instance_state.side_effect = ['pending', 'shutting-down']
+
+        provider = EC2Cloud(**self.kwargs)
+
+        with pytest.raises(IpaCloudException) as error:
+            provider._wait_on_instance('running')
+
+        assert str(error.value) == \
+            'Instance entered terminal state shutting-down while ' \
+            'waiting for running.'
+        assert mock_get_instance_state.call_count == 2
+
+        # Waiting for a terminal state itself is allowed
+        mock_get_instance_state.side_effect = None
+        mock_get_instance_state.return_value = 'terminated'
+        provider._wait_on_instance('terminated')
+
     @patch.object(EC2Cloud, '_wait_on_instance')
     @patch.object(EC2Cloud, '_connect')
     def test_ec2_launch_instance(self, mock_connect, mock_wait_on_instance):
@@ -176,6 +248,24 @@ class TestEC2Provider(object):
         assert instance.instance_id == provider.running_instance_id
         assert resource.create_instances.call_count == 1
 
+    @patch.object(EC2Cloud, '_await_state')
+    @patch.object(EC2Cloud, '_create_instance')
+    def test_ec2_launch(self, mock_create_instance, mock_await_state):
+        """Test ec2 provider async launch method."""
+        async def await_state(state, timeout):
+            return None
+
+        mock_await_state.side_effect = await_state
+        provider = EC2Cloud(**self.kwargs)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(provider.launch())
+        finally:
+            loop.close()
+
+        mock_create_instance.assert_called_once_with()
+        mock_await_state.assert_called_once_with('running', 600)
+
     @patch.object(EC2Cloud, '_get_instance')
     def test_ec2_set_image_id(self, mock_get_instance):
         """Test ec2 provider set image id method."""
@@ -242,7 +332,9 @@ class TestEC2Provider(object):
         mock_get_instance.return_value = instance
 
         provider = EC2Cloud(**self.kwargs)
+        provider._instance_cache = ('i-123456789', instance, 0.0)
         provider._start_instance()
+        assert provider._instance_cache == (None, None, 0.0)
 
         mock_wait_on_instance.assert_called_once_with('running', 600)
         assert mock_get_instance.call_count == 1
@@ -259,7 +351,9 @@ class TestEC2Provider(object):
         mock_get_instance.return_value = instance
 
         provider = EC2Cloud(**self.kwargs)
+        provider._instance_cache = ('i-123456789', instance, 0.0)
         provider._stop_instance()
+        assert provider._instance_cache == (None, None, 0.0)
 
         mock_wait_on_instance.assert_called_once_with('stopped', 600)
         assert mock_get_instance.call_count == 1
@@ -272,7 +366,9 @@ class TestEC2Provider(object):
         mock_get_instance.return_value = instance
 
         provider = EC2Cloud(**self.kwargs)
+        provider._instance_cache = ('i-123456789', instance, 0.0)
         provider._terminate_instance()
+        assert provider._instance_cache == (None, None, 0.0)
         assert mock_get_instance.call_count == 1
 
     @patch('time.sleep')
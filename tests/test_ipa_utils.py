@@ -38,11 +38,30 @@ from unittest.mock import MagicMock, patch
 LOCALHOST = '127.0.0.1'
 
 
+def get_mock_channel(out=b'', err=b'', exit_status=0):
+    """Return a mock channel which serves the given output."""
+    streams = {'out': out, 'err': err}
+
+    def recv(stream, nbytes):
+        data = streams[stream][:nbytes]
+        streams[stream] = streams[stream][nbytes:]
+        return data
+
+    channel = MagicMock()
+    channel.recv_ready.side_effect = lambda: bool(streams['out'])
+    channel.recv_stderr_ready.side_effect = lambda: bool(streams['err'])
+    channel.recv.side_effect = lambda nbytes: recv('out', nbytes)
+    channel.recv_stderr.side_effect = lambda nbytes: recv('err', nbytes)
+    channel.exit_status_ready.return_value = True
+    channel.recv_exit_status.return_value = exit_status
+    return channel
+
+
 @patch('img_proof.ipa_utils.execute_ssh_command')
 def test_utils_clear_cache(mock_exec_cmd):
     """Test img_proof utils client cache and clear specific ip."""
     client = MagicMock()
-    ipa_utils.CLIENT_CACHE[LOCALHOST] = client
+    ipa_utils.CLIENT_CACHE[(LOCALHOST, 'root')] = client
 
     val = ipa_utils.get_ssh_client(LOCALHOST, 'tests/data/ida_test')
     assert client == val
@@ -50,29 +69,77 @@ def test_utils_clear_cache(mock_exec_cmd):
     # Test clear specfic IP
     ipa_utils.clear_cache(LOCALHOST)
     with pytest.raises(KeyError):
-        ipa_utils.CLIENT_CACHE[LOCALHOST]
+        ipa_utils.CLIENT_CACHE[(LOCALHOST, 'root')]
 
-    ipa_utils.CLIENT_CACHE[LOCALHOST] = client
+    ipa_utils.CLIENT_CACHE[(LOCALHOST, 'root')] = client
 
     # Test clear all cache
     ipa_utils.clear_cache()
     with pytest.raises(KeyError):
-        ipa_utils.CLIENT_CACHE[LOCALHOST]
+        ipa_utils.CLIENT_CACHE[(LOCALHOST, 'root')]
+
+
+@patch('img_proof.ipa_utils.establish_ssh_connection')
+@patch('img_proof.ipa_utils.execute_ssh_command')
+def test_utils_get_ssh_client_inactive(mock_exec_cmd, mock_establish):
+    """Test a cached client with an inactive transport is replaced."""
+    client = MagicMock()
+    client.get_transport.return_value.is_active.return_value = False
+    ipa_utils.CLIENT_CACHE[(LOCALHOST, 'root')] = client
+
+    new_client = MagicMock()
+    mock_establish.return_value = new_client
+
+    val = ipa_utils.get_ssh_client(LOCALHOST, 'tests/data/ida_test')
+    assert val == new_client
+    assert ipa_utils.CLIENT_CACHE[(LOCALHOST, 'root')] == new_client
+    client.close.assert_called_once_with()
+
+    ipa_utils.clear_cache()
 
 
-@patch.object(paramiko.SSHClient, 'exec_command')
+@patch('img_proof.ipa_utils.SSH_CLIENT_CACHE_SIZE', 2)
+def test_utils_cache_client_evicts_oldest():
+    """Test the least recently used client is closed and evicted."""
+    clients = [MagicMock(), MagicMock(), MagicMock()]
+
+    ipa_utils.cache_client('10.0.0.1', 'root', clients[0])
+    ipa_utils.cache_client('10.0.0.2', 'root', clients[1])
+    ipa_utils.CLIENT_CACHE.move_to_end(('10.0.0.1', 'root'))
+    ipa_utils.cache_client('10.0.0.3', 'root', clients[2])
+
+    assert list(ipa_utils.CLIENT_CACHE) == [
+        ('10.0.0.1', 'root'),
+        ('10.0.0.3', 'root')
+    ]
+    clients[1].close.assert_called_once_with()
+    assert clients[0].close.call_count == 0
+
+    ipa_utils.clear_cache()
+
+
+@patch.object(paramiko.SSHClient, 'get_transport')
 @patch.object(paramiko.SSHClient, 'connect')
-def test_utils_get_ssh_connection(mock_connect, mock_exec_cmd):
+def test_utils_get_ssh_connection(mock_connect, mock_get_transport):
     """Test successful ssh connection."""
-    stdin = stdout = stderr = MagicMock()
-    stderr.read.return_value = b''
+    transport = MagicMock()
+    channel = get_mock_channel()
+    transport.open_session.return_value = channel
 
     mock_connect.return_value = None
-    mock_exec_cmd.return_value = (stdin, stdout, stderr)
+    mock_get_transport.return_value = transport
 
     ipa_utils.get_ssh_client(LOCALHOST, 'tests/data/ida_test')
-    assert mock_connect.call_count == 1
-    assert mock_exec_cmd.call_count == 1
+    mock_connect.assert_called_once_with(
+        LOCALHOST,
+        port=22,
+        username='root',
+        key_filename='tests/data/ida_test',
+        look_for_keys=False,
+        timeout=10
+    )
+    channel.exec_command.assert_called_once_with('ls')
+    transport.set_keepalive.assert_called_once_with(30)
 
     # Clear cache for subsequent tests.
     ipa_utils.clear_cache()
@@ -98,42 +165,101 @@ def test_utils_ssh_connect_exception(mock_connect, mock_sleep, mock_time):
     assert mock_connect.call_count > 0
 
 
-def test_utils_ssh_exec_command():
-    """Test successful command execution."""
-    stdin = MagicMock()
-    stdin.read.return_value = ''
+@patch('random.uniform')
+@patch.object(time, 'sleep')
+def test_utils_backoff(mock_sleep, mock_uniform):
+    """Test backoff sleeps with jitter and returns capped next delay."""
+    mock_uniform.return_value = 0.5
+
+    assert ipa_utils.backoff(1) == 2
+    mock_sleep.assert_called_once_with(1.5)
+    mock_uniform.assert_called_once_with(0, 0.5)
 
-    stderr = MagicMock()
-    stderr.read.return_value = ''
+    assert ipa_utils.backoff(20) == 30
 
-    stdout = MagicMock()
-    stdout.read.return_value = b'test test.sh'
+
+@patch('random.uniform')
+@patch.object(time, 'sleep')
+@patch.object(paramiko.SSHClient, 'connect')
+def test_utils_establish_ssh_connection_backoff(
+    mock_connect, mock_sleep, mock_uniform
+):
+    """Test failed connection attempts are retried with backoff."""
+    mock_connect.side_effect = paramiko.ssh_exception.SSHException('ERROR!')
+    mock_uniform.return_value = 0
+
+    with pytest.raises(IpaSSHException) as error:
+        ipa_utils.establish_ssh_connection(
+            LOCALHOST,
+            'tests/data/ida_test',
+            'root',
+            22,
+            attempts=4
+        )
+
+    assert str(error.value) == \
+        'Failed to establish SSH connection to instance.'
+    assert mock_connect.call_count == 4
+    assert [args[0] for args, kwargs in mock_sleep.call_args_list] == \
+        [1, 2, 4]
+
+
+def test_utils_ssh_exec_command():
+    """Test successful command execution."""
+    channel = get_mock_channel(out=b'test test.sh')
 
     client = MagicMock()
-    client.exec_command.return_value = (stdin, stdout, stderr)
+    client.get_transport.return_value.open_session.return_value = channel
 
     out = ipa_utils.execute_ssh_command(client, 'ls')
     assert out == 'test test.sh'
+    channel.exec_command.assert_called_once_with('ls')
+    channel.close.assert_called_once_with()
 
 
-def test_utils_ssh_exec_command_exception():
-    """Test error in ssh exec command raises exception."""
-    stdin = MagicMock()
+@patch('select.select')
+def test_utils_ssh_exec_command_wait(mock_select):
+    """Test command execution waits on the channel for output."""
+    channel = get_mock_channel(out=b'done')
+    channel.recv_ready.side_effect = [False, True, False]
+    channel.exit_status_ready.side_effect = [False, True]
+
+    client = MagicMock()
+    client.get_transport.return_value.open_session.return_value = channel
+
+    out = ipa_utils.execute_ssh_command(client, 'sleep 1; echo done')
+    assert out == 'done'
+    mock_select.assert_called_once_with([channel], [], [], 1)
 
-    stderr = MagicMock()
-    stderr.read.return_value = b'Exception: ls is not allowed!'
 
-    stdout = MagicMock()
-    stdout.read.return_value = b'Other information\n'
+def test_utils_ssh_exec_command_stderr():
+    """Test stderr output of a successful command is not an error."""
+    channel = get_mock_channel(out=b'done\n', err=b'Refreshing repos...\n')
 
     client = MagicMock()
-    client.exec_command.return_value = (stdin, stdout, stderr)
+    client.get_transport.return_value.open_session.return_value = channel
+
+    out = ipa_utils.execute_ssh_command(client, 'zypper refresh')
+    assert out == 'done\n'
+
+
+def test_utils_ssh_exec_command_exception():
+    """Test error in ssh exec command raises exception."""
+    channel = get_mock_channel(
+        out=b'Other information\n',
+        err=b'Exception: ls is not allowed!',
+        exit_status=2
+    )
+
+    client = MagicMock()
+    client.get_transport.return_value.open_session.return_value = channel
 
     with pytest.raises(IpaSSHException) as error:
         ipa_utils.execute_ssh_command(client, 'ls')
 
     msg = 'Other information\nException: ls is not allowed!'
     assert str(error.value) == msg
+    channel.close.assert_called_once_with()
 
 
 def test_utils_expand_test_files():
@@ -182,6 +308,21 @@ def test_utils_expand_sync_points():
     assert expanded[3] == 'test_hard_reboot'
 
 
+def test_utils_get_tests_from_description_cycle():
+    """Test descriptions that include each other are parsed once."""
+    tests, descriptions = ipa_utils.get_test_files(['tests/data/tests6'])
+    parsed = set()
+
+    expanded = ipa_utils.get_tests_from_description(
+        'test_cycle_a',
+        descriptions,
+        parsed
+    )
+
+    assert expanded == ['test_image', 'test_sles']
+    assert parsed == set(descriptions.values())
+
+
 @patch('img_proof.ipa_utils.execute_ssh_command')
 def test_utils_extract_archive(mock_exec_ssh_command):
     client = MagicMock()
@@ -196,6 +337,70 @@ def test_utils_extract_archive(mock_exec_ssh_command):
     mock_exec_ssh_command.reset_mock()
 
 
+def test_utils_get_test_files():
+    """Test get test files finds tests and test descriptions."""
+    tests, descriptions = ipa_utils.get_test_files(['tests/data/tests'])
+
+    assert tests['test_image'] == 'tests/data/tests/test_image.py'
+    assert tests['test_sles'] == 'tests/data/tests/test_sles.py'
+    assert descriptions['test_sles_desc'] == \
+        'tests/data/tests/test_sles_desc.yaml'
+
+
+def test_utils_get_test_files_multiple_dots():
+    """Test a test file name with multiple dots keeps its full name."""
+    tests, descriptions = ipa_utils.get_test_files(['tests/data/tests5'])
+
+    assert tests == {'test_image.v2': 'tests/data/tests5/test_image.v2.py'}
+    assert descriptions == {}
+
+
+def test_utils_get_test_files_not_a_dir():
+    """Test a test dir that cannot be listed is skipped."""
+    tests, descriptions = ipa_utils.get_test_files(
+        ['tests/data/empty.file']
+    )
+
+    assert tests == {}
+    assert descriptions == {}
+
+
+def test_utils_get_test_files_multiple_dirs():
+    """Test tests from multiple test dirs are merged."""
+    tests, descriptions = ipa_utils.get_test_files(
+        ['tests/data/tests', 'tests/data/tests5', 'tests/data/fake']
+    )
+
+    assert tests['test_image'] == 'tests/data/tests/test_image.py'
+    assert tests['test_image.v2'] == 'tests/data/tests5/test_image.v2.py'
+    assert descriptions['test_image_desc'] == \
+        'tests/data/tests/test_image_desc.yaml'
+
+
+def test_utils_get_test_files_multiple_dirs_duplicate():
+    """Test duplicates are found across more than two test dirs."""
+    test_dirs = ['tests/data/tests', 'tests/data/tests5', 'tests/data/tests4']
+
+    with pytest.raises(IpaUtilsException) as error:
+        ipa_utils.get_test_files(test_dirs)
+    assert (
+        'Duplicate test description file name found: '
+        'tests/data/tests4/test_image_desc.yaml, '
+        'tests/data/tests/test_image_desc.yaml' in
+        str(error.value)
+    )
+
+
+def test_utils_walk_test_dir():
+    """Test walk test dir returns tests of a single dir."""
+    tests, descriptions = ipa_utils.walk_test_dir('tests/data/tests4')
+
+    assert tests == {}
+    assert descriptions == {
+        'test_image_desc': 'tests/data/tests4/test_image_desc.yaml'
+    }
+
+
 def test_utils_duplicate_files():
     """Test exception raised if duplicate test files exist."""
     test_dirs = ['tests/data/tests', 'tests/data/tests2']
@@ -248,6 +453,44 @@ def test_get_config_values():
     assert data['test_dirs'] == 'tests/data/tests'
 
 
+def test_get_config_values_cache():
+    """Test config file is only parsed again if it changes."""
+    config_file = NamedTemporaryFile(mode='w', delete=False)
+    config_file.write('[ec2]\nregion = us-west-1\n')
+    config_file.close()
+
+    try:
+        with patch.object(
+            ipa_utils.configparser.ConfigParser,
+            'read',
+            autospec=True,
+            side_effect=ipa_utils.configparser.ConfigParser.read
+        ) as mock_read:
+            data = ipa_utils.get_config_values(config_file.name, 'ec2')
+            assert data['region'] == 'us-west-1'
+
+            ipa_utils.get_config_values(config_file.name, 'ec2')
+            assert mock_read.call_count == 1
+
+            os.utime(config_file.name, (0, 0))
+            ipa_utils.get_config_values(config_file.name, 'ec2')
+            assert mock_read.call_count == 2
+    finally:
+        os.remove(config_file.name)
+
+
+def test_get_config_values_missing_section():
+    """Test missing sections are skipped in get config values."""
+    data = ipa_utils.get_config_values(
+        'tests/data/config',
+        'fake-section',
+        'img_proof'
+    )
+
+    assert data['test_dirs'] == 'tests/data/tests'
+    assert 'region' not in data
+
+
 def test_utils_get_config_values_exceptions():
     """Test utils get config values function invalid path."""
     with pytest.raises(IpaUtilsException) as error:
@@ -280,6 +523,10 @@ def test_utils_get_random_string():
     assert len(rand_string) == 12
     assert isinstance(rand_string, str)
 
+    rand_string = ipa_utils.get_random_string(length=5)
+    assert len(rand_string) == 5
+    assert rand_string.islower() and rand_string.isalpha()
+
 
 def test_utils_put_file():
     client = MagicMock()
@@ -317,9 +564,57 @@ def test_utils_ssh_config_context_mgr():
             assert conf_file.readline() == 'Host *\n'
             assert conf_file.readline() == \
                 '    IdentityFile tests/data/ida_test\n'
-            assert conf_file.readline() == '    User root'
+            assert conf_file.readline() == '    User root\n'
+
+    # Config file is cached for the same credentials
+    with ipa_utils.ssh_config('root', 'tests/data/ida_test') as conf2:
+        assert conf2 == conf
+
+    with ipa_utils.ssh_config('ec2-user', 'tests/data/ida_test') as conf3:
+        assert conf3 != conf
 
+    ipa_utils.clear_ssh_config_cache()
     assert not os.path.isfile(conf)
+    assert not os.path.isfile(conf3)
+    assert not ipa_utils.SSH_CONFIG_CACHE
+
+
+def test_utils_get_yaml_config_cache():
+    """Test yaml config is cached until the file changes."""
+    config_file = NamedTemporaryFile(mode='w', suffix='.yaml', delete=False)
+    config_file.write('tests:\n  - test_image\n')
+    config_file.close()
+
+    try:
+        with patch('img_proof.ipa_utils.yaml.load') as mock_load:
+            mock_load.return_value = {'tests': ['test_image']}
+
+            config = ipa_utils.get_yaml_config(config_file.name)
+            config['tests'].append('test_sles')
+
+            # Cached copy is returned and not affected by changes
+            assert ipa_utils.get_yaml_config(config_file.name) == \
+                {'tests': ['test_image']}
+            assert mock_load.call_count == 1
+
+            os.utime(config_file.name, (0, 0))
+            ipa_utils.get_yaml_config(config_file.name)
+            assert mock_load.call_count == 2
+    finally:
+        os.remove(config_file.name)
+
+
+def test_utils_get_yaml_config_utf8():
+    """Test yaml config with non ascii characters is decoded."""
+    config_file = NamedTemporaryFile(mode='wb', suffix='.yaml', delete=False)
+    config_file.write('description: caf\u00e9\n'.encode('utf-8'))
+    config_file.close()
+
+    try:
+        config = ipa_utils.get_yaml_config(config_file.name)
+        assert config == {'description': 'caf\u00e9'}
+    finally:
+        os.remove(config_file.name)
 
 
 def test_utils_history_log():